@@ -26,4 +26,14 @@ def empty_float(s: str, default: float = 0.0) -> float:
   """Parse ASCII to a float, and empty strings count as zero."""
   if not s:
     return default
-  return float(s)
\ No newline at end of file
+  return float(s)
+
+
+# Settings for `explain`, kept here rather than in explain.py so the CLI can
+# offer them as argparse choices/defaults without importing numpy.
+
+# Groups of model features that per-player prediction breakdowns total over.
+FEATURE_GROUP_NAMES = ("season_stats", "team", "position", "week_one")
+
+# How many of each player's biggest contributors a breakdown indexes.
+DEFAULT_TOP_K = 10
@@ -0,0 +1,204 @@
+"""Labelled examples: feature vectors for players, paired with IDP outcomes."""
+
+import dataclasses
+import hashlib
+
+import numpy
+
+import seasonstats
+import weekonestats
+
+
+NUM_FEATURES = (
+  (2 * weekonestats.NUM_WEEK_ONE_FEATURES) + 
+  seasonstats.NUM_SEASON_FEATURES
+)
+
+NEXT_WEEK_ONE_FEATURES = tuple(
+  "next_week_one_" + f for f in weekonestats.WEEK_ONE_FEATURES)
+PREV_WEEK_ONE_FEATURES = tuple(
+  "prev_week_one_" + f for f in weekonestats.WEEK_ONE_FEATURES)
+PREV_SEASON_STAT_FEATURES = tuple(
+  "prev_season_" + f for f in seasonstats.SEASON_STAT_FEATURES)
+PREV_SEASON_TEAM_FEATURES = tuple(
+  "prev_season_" + f for f in seasonstats.SEASON_TEAM_FEATURES)
+PREV_SEASON_POSITION_FEATURES = tuple(
+  "prev_season_" + f for f in seasonstats.SEASON_POSITION_FEATURES)
+
+FEATURES = (
+  NEXT_WEEK_ONE_FEATURES +
+  PREV_WEEK_ONE_FEATURES +
+  PREV_SEASON_STAT_FEATURES +
+  PREV_SEASON_TEAM_FEATURES +
+  PREV_SEASON_POSITION_FEATURES
+)
+
+
+@dataclasses.dataclass
+class LabelledExamples:
+  pids: tuple[str, ...]
+  features: numpy.ndarray
+  labels: tuple[float, ...]
+  weights: tuple[float, ...]
+
+  def __post_init__(self):
+    if len(self.pids) != len(self.labels):
+      raise ValueError(f"len(pids) is {len(self.pids)} "
+                       f"but len(labels) is {len(self.labels)}")
+    if len(self.pids) != len(self.weights):
+      raise ValueError(f"len(pids) is {len(self.pids)} "
+                       f"but len(weights) is {len(self.weights)}")
+    if len(self.pids) != self.features.shape[0]:
+      raise ValueError(f"len(pids) is {len(self.pids)} "
+                       f"but len(labels) is {len(self.labels)}")
+  
+  def split(
+      self,
+      salt: str = "",
+      fraction: float = 0.8
+  ) -> tuple["LabelledExamples", "LabelledExamples"]:
+    leftp = []
+    leftf = []
+    leftl = []
+    leftw = []
+    rightp = []
+    rightf = []
+    rightl = []
+    rightw = []
+    big_number = 1000000
+    threshold = fraction * big_number
+    plw = zip(self.pids, self.labels, self.weights)
+    for i, (pid, label, weight) in enumerate(plw):
+      salty_pid = (salt + pid).encode("utf-8")
+      hashcode = int(hashlib.sha256(salty_pid).hexdigest(), 16)
+      if (hashcode % big_number) <= threshold:
+        leftp.append(pid)
+        leftf.append(i)
+        leftl.append(label)
+        leftw.append(weight)
+      else:
+        rightp.append(pid)
+        rightf.append(i)
+        rightl.append(label)
+        rightw.append(weight)
+    return (
+      LabelledExamples(
+        pids=tuple(leftp),
+        features=self.features[leftf, :],
+        labels=tuple(leftl),
+        weights=tuple(leftw)
+      ),
+      LabelledExamples(
+        pids=tuple(rightp),
+        features=self.features[rightf, :],
+        labels=tuple(rightl),
+        weights=tuple(rightw)
+      ),
+    )
+  
+  @classmethod
+  def merge(
+    cls,
+    first: "LabelledExamples",
+    second: "LabelledExamples",
+    second_weight_scale: float
+  ) -> "LabelledExamples":
+    merge_pids = first.pids + second.pids
+    merge_feats = numpy.vstack([first.features, second.features])
+    merge_labels = first.labels + second.labels
+    merge_weights = (
+      first.weights +
+      tuple(second_weight_scale * wi for wi in second.weights)
+    )
+    return LabelledExamples(
+      pids=merge_pids,
+      features=merge_feats,
+      labels=merge_labels,
+      weights=merge_weights
+    )
+
+  def save(self, filename: str):
+    """Write these examples to a `.npz` file, to skip rebuilding from CSVs."""
+    numpy.savez(
+      filename,
+      pids=numpy.array(self.pids, str),
+      features=self.features,
+      labels=numpy.array(self.labels, float),
+      weights=numpy.array(self.weights, float),
+    )
+
+  @classmethod
+  def load(cls, filename: str) -> "LabelledExamples":
+    """Read back examples written by `save`."""
+    with numpy.load(filename) as npz:
+      return LabelledExamples(
+        pids=tuple(str(pid) for pid in npz["pids"]),
+        features=npz["features"],
+        labels=tuple(float(label) for label in npz["labels"]),
+        weights=tuple(float(weight) for weight in npz["weights"]),
+      )
+
+
+def player_features(
+    pid: str,
+    prev_roster: weekonestats.WeekOneLeague,
+    prev_season: seasonstats.SeasonStats,
+    next_roster: weekonestats.WeekOneLeague,
+) -> numpy.ndarray:
+  """One player's (1, NUM_FEATURES) row; missing sources stay zero."""
+  nwos = weekonestats.NUM_WEEK_ONE_FEATURES
+  vi = numpy.zeros((1, NUM_FEATURES), float)
+  if pid in next_roster.players:
+    vi[0, :nwos] = next_roster.players[pid].features()
+  if pid in prev_roster.players:
+    vi[0, nwos:(2 * nwos)] = prev_roster.players[pid].features()
+  if pid in prev_season:
+    vi[0, (2 * nwos):] = prev_season.get_player_stats(pid).features()
+  return vi
+
+
+def build_labelled_examples(
+    prev_roster: weekonestats.WeekOneLeague,
+    prev_season: seasonstats.SeasonStats,
+    next_roster: weekonestats.WeekOneLeague,
+    next_season: seasonstats.SeasonStats) -> LabelledExamples:
+  pids = []
+  features = []
+  labels = []
+  weights = []
+  for pid in next_season.player_ids:
+    if pid not in next_roster.players:
+      continue
+    pids.append(pid)
+    next_season_stats = next_season.get_player_stats(pid)
+    labels.append(next_season_stats.idp_score())
+    weights.append(next_season_stats.weight())
+    features.append(
+      player_features(pid, prev_roster, prev_season, next_roster))
+  matrix = numpy.vstack(features)
+  return LabelledExamples(
+    pids=tuple(pids),
+    features=matrix,
+    labels=tuple(labels),
+    weights=tuple(weights)
+  )
+
+
+def build_unlabelled_examples(
+    prev_roster: weekonestats.WeekOneLeague,
+    prev_season: seasonstats.SeasonStats,
+    next_roster: weekonestats.WeekOneLeague,
+) -> LabelledExamples:
+  pids = []
+  features = []
+  for pid in next_roster.players:
+    pids.append(pid)
+    features.append(
+      player_features(pid, prev_roster, prev_season, next_roster))
+  matrix = numpy.vstack(features)
+  return LabelledExamples(
+    pids=tuple(pids),
+    features=matrix,
+    labels=tuple(0 for _ in pids),
+    weights=tuple(0 for _ in pids),
+  )
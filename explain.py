@@ -0,0 +1,171 @@
+"""Break each player's predicted IDP down into per-feature contributions.
+
+A ridge prediction is `intercept + sum(coef * feature)`, so the contribution of
+each feature is just that product. This computes the whole player-by-feature
+contribution matrix in one pass, and saves it alongside a top-k contributor
+index and per-feature-group subtotals so draft-time lookups don't recompute
+anything.
+"""
+
+import dataclasses
+
+import numpy
+
+import common
+import examples
+import ridgemodel
+
+
+# Feature group name mapped to the feature names that belong to it.
+FEATURE_GROUPS = dict(zip(
+  common.FEATURE_GROUP_NAMES,
+  (
+    examples.PREV_SEASON_STAT_FEATURES,
+    examples.PREV_SEASON_TEAM_FEATURES,
+    examples.PREV_SEASON_POSITION_FEATURES,
+    examples.NEXT_WEEK_ONE_FEATURES + examples.PREV_WEEK_ONE_FEATURES,
+  ),
+  strict=True,
+))
+
+
+def group_masks(feature_names: tuple[str, ...]) -> numpy.ndarray:
+  """Boolean (num groups, num features) matrix of feature group membership."""
+  masks = numpy.zeros((len(FEATURE_GROUPS), len(feature_names)), bool)
+  for g, group_features in enumerate(FEATURE_GROUPS.values()):
+    members = set(group_features)
+    masks[g, :] = [name in members for name in feature_names]
+  return masks
+
+
+@dataclasses.dataclass
+class Explanation:
+  """Per-feature contributions to every scored player's predicted IDP."""
+  pids: tuple[str, ...]
+  feature_names: tuple[str, ...]
+  intercept: float
+  predictions: numpy.ndarray  # (num players,)
+  contributions: numpy.ndarray  # (num players, num features)
+  top_features: numpy.ndarray  # (num players, k), largest |contribution| 1st
+  group_totals: numpy.ndarray  # (num players, num groups)
+
+  def __post_init__(self):
+    if len(self.pids) != self.contributions.shape[0]:
+      raise ValueError(f"len(pids) is {len(self.pids)} but contributions "
+                       f"has {self.contributions.shape[0]} rows")
+    if len(self.feature_names) != self.contributions.shape[1]:
+      raise ValueError(f"len(feature_names) is {len(self.feature_names)} "
+                       f"but contributions has "
+                       f"{self.contributions.shape[1]} columns")
+    self._rows = {pid: i for i, pid in enumerate(self.pids)}
+
+  def __contains__(self, pid: str) -> bool:
+    return pid in self._rows
+
+  def prediction(self, pid: str) -> float:
+    return float(self.predictions[self._rows[pid]])
+
+  def top_contributors(self, pid: str) -> list[tuple[str, float]]:
+    """Up to k of the player's biggest nonzero contributors, biggest first.
+
+    Rookies have fewer than k nonzero features; the index pads their rows
+    with zero contributions, which played no part in the prediction.
+    """
+    i = self._rows[pid]
+    return [
+      (self.feature_names[j], float(self.contributions[i, j]))
+      for j in self.top_features[i]
+      if self.contributions[i, j]
+    ]
+
+  def group_breakdown(self, pid: str) -> dict[str, float]:
+    """Total contribution of each feature group to the player's prediction."""
+    i = self._rows[pid]
+    return {
+      group: float(total)
+      for group, total in zip(FEATURE_GROUPS, self.group_totals[i])
+    }
+
+  def group_contributors(self, pid: str, group: str) -> list[tuple[str, float]]:
+    """Nonzero contributions from one feature group, biggest first."""
+    i = self._rows[pid]
+    members = set(FEATURE_GROUPS[group])
+    contribs = [
+      (name, float(c))
+      for name, c in zip(self.feature_names, self.contributions[i])
+      if c and name in members
+    ]
+    return sorted(contribs, key=lambda t: abs(t[1]), reverse=True)
+
+  def players_by_group(self, group: str) -> list[tuple[str, float]]:
+    """Every player's total from one feature group, biggest first."""
+    g = list(FEATURE_GROUPS).index(group)
+    order = numpy.argsort(-self.group_totals[:, g], kind="stable")
+    return [(self.pids[i], float(self.group_totals[i, g])) for i in order]
+
+  def save(self, filename: str):
+    """Write to a compressed `.npz`, one array per column of data."""
+    numpy.savez_compressed(
+      filename,
+      pids=numpy.array(self.pids, str),
+      feature_names=numpy.array(self.feature_names, str),
+      intercept=numpy.array(self.intercept, float),
+      predictions=self.predictions,
+      contributions=self.contributions,
+      top_features=self.top_features,
+      group_totals=self.group_totals,
+    )
+
+  @classmethod
+  def load(cls, filename: str) -> "Explanation":
+    """Read back an explanation written by `save`."""
+    with numpy.load(filename) as npz:
+      return Explanation(
+        pids=tuple(str(pid) for pid in npz["pids"]),
+        feature_names=tuple(str(name) for name in npz["feature_names"]),
+        intercept=float(npz["intercept"]),
+        predictions=npz["predictions"],
+        contributions=npz["contributions"],
+        top_features=npz["top_features"],
+        group_totals=npz["group_totals"],
+      )
+
+
+def explain(
+    model: ridgemodel.RidgeModel,
+    scored: examples.LabelledExamples,
+    top_k: int = common.DEFAULT_TOP_K
+) -> Explanation:
+  """Contribution matrix, top-k index, and group subtotals for all players."""
+  if top_k < 1:
+    raise ValueError(f"top_k must be at least 1, not {top_k}")
+  if scored.features.shape[1] != len(model.coefs):
+    raise ValueError(f"features have {scored.features.shape[1]} columns "
+                     f"but model has {len(model.coefs)} coefficients")
+  masks = group_masks(model.feature_names)
+  ungrouped = [
+    name
+    for name, count in zip(model.feature_names, masks.sum(axis=0))
+    if count != 1
+  ]
+  if ungrouped:
+    raise ValueError(f"Features not in exactly one group: {ungrouped}")
+  contributions = scored.features * model.coefs[numpy.newaxis, :]
+  predictions = contributions.sum(axis=1) + model.intercept
+  group_totals = contributions @ masks.T
+  # Partition out the k largest magnitudes, then sort only those k.
+  k = min(top_k, contributions.shape[1])
+  magnitudes = numpy.abs(contributions)
+  top = numpy.argpartition(-magnitudes, k - 1, axis=1)[:, :k]
+  top_order = numpy.argsort(
+    -numpy.take_along_axis(magnitudes, top, axis=1), axis=1, kind="stable")
+  top = numpy.take_along_axis(top, top_order, axis=1)
+  return Explanation(
+    pids=scored.pids,
+    feature_names=model.feature_names,
+    intercept=model.intercept,
+    predictions=predictions,
+    contributions=contributions.astype(numpy.float32),
+    top_features=top.astype(numpy.int16),
+    group_totals=group_totals.astype(numpy.float32),
+  )
@@ -1,243 +1,159 @@
 """Predict total IDP score earnings of players in 2024 from their 2023 stats.
 
 Produces a ranking of players, as well as a ridge regression model, and saves
-both in the CSVs at the given locations.
+both in CSVs. Each step is its own subcommand, and only imports what it needs:
+numpy for building examples and predicting, scikit-learn only for `tune` and
+`fit`. Listing players and ranking saved predictions need neither.
+
+Example files get a `.npz` extension if their path doesn't already end in one.
 
 Usage:
 
-  $ python predict_season_main.py rankings.csv ridge_coefs.csv
+  $ python predict_season_main.py load 2023
+  $ python predict_season_main.py load 2023 --pid 00-0036358
+  $ python predict_season_main.py load 2022 --roster-year 2024 --pid 00-0036358
+  $ python predict_season_main.py build-examples train.npz score.npz
+  $ python predict_season_main.py tune train.npz
+  $ python predict_season_main.py fit train.npz ridge_coefs.csv
+  $ python predict_season_main.py predict ridge_coefs.csv score.npz preds.csv
+  $ python predict_season_main.py rank preds.csv rankings.csv
+  $ python predict_season_main.py explain ridge_coefs.csv score.npz why.npz
+  $ python predict_season_main.py why why.npz 00-0036358
+  $ python predict_season_main.py why why.npz 00-0036358 --group position
+  $ python predict_season_main.py why why.npz --group week_one
 
 """
 
+import argparse
 import csv
-import dataclasses
-import hashlib
-import sys
-
-import numpy
-
-from sklearn import linear_model # type: ignore
 
+import common
 import seasonstats
 import weekonestats
 
 
-NUM_FEATURES = (
-  (2 * weekonestats.NUM_WEEK_ONE_FEATURES) + 
-  seasonstats.NUM_SEASON_FEATURES
-)
+# Season year mapped to its stat CSVs, and its Week 1 roster CSV.
+SEASON_FILES = {
+  2021: seasonstats.SEASON_FILES_2021,
+  2022: seasonstats.SEASON_FILES_2022,
+  2023: seasonstats.SEASON_FILES_2023,
+}
+ROSTER_FILES = {
+  2021: weekonestats.ROSTER_FILE_2021,
+  2022: weekonestats.ROSTER_FILE_2022,
+  2023: weekonestats.ROSTER_FILE_2023,
+  2024: weekonestats.ROSTER_FILE_2024,
+}
+
+PREDICTION_FIELDS = ("pid", "predicted_idp")
 
-FEATURES = (
-  tuple("next_week_one_" + f for f in weekonestats.WEEK_ONE_FEATURES) +
-  tuple("prev_week_one_" + f for f in weekonestats.WEEK_ONE_FEATURES) +
-  tuple("prev_season_" + f for f in seasonstats.SEASON_STAT_FEATURES)
+RANKING_FIELDS = (
+  "pid",
+  "full_name",
+  "position",
+  "team",
+  "predicted_idp",
+  "drafted",
+  "short_name",
 )
 
 
-@dataclasses.dataclass
-class LabelledExamples:
-  pids: tuple[str, ...]
-  features: numpy.ndarray
-  labels: tuple[float, ...]
-  weights: tuple[float, ...]
-
-  def __post_init__(self):
-    if len(self.pids) != len(self.labels):
-      raise ValueError(f"len(pids) is {len(self.pids)} "
-                       f"but len(labels) is {len(self.labels)}")
-    if len(self.pids) != len(self.weights):
-      raise ValueError(f"len(pids) is {len(self.pids)} "
-                       f"but len(weights) is {len(self.weights)}")
-    if len(self.pids) != self.features.shape[0]:
-      raise ValueError(f"len(pids) is {len(self.pids)} "
-                       f"but len(labels) is {len(self.labels)}")
-  
-  def split(
-      self,
-      salt: str = "",
-      fraction: float = 0.8
-  ) -> tuple["LabelledExamples", "LabelledExamples"]:
-    leftp = []
-    leftf = []
-    leftl = []
-    leftw = []
-    rightp = []
-    rightf = []
-    rightl = []
-    rightw = []
-    big_number = 1000000
-    threshold = fraction * big_number
-    plw = zip(self.pids, self.labels, self.weights)
-    for i, (pid, label, weight) in enumerate(plw):
-      salty_pid = (salt + pid).encode("utf-8")
-      hashcode = int(hashlib.sha256(salty_pid).hexdigest(), 16)
-      if (hashcode % big_number) <= threshold:
-        leftp.append(pid)
-        leftf.append(i)
-        leftl.append(label)
-        leftw.append(weight)
-      else:
-        rightp.append(pid)
-        rightf.append(i)
-        rightl.append(label)
-        rightw.append(weight)
-    return (
-      LabelledExamples(
-        pids=tuple(leftp),
-        features=self.features[leftf, :],
-        labels=tuple(leftl),
-        weights=tuple(leftw)
-      ),
-      LabelledExamples(
-        pids=tuple(rightp),
-        features=self.features[rightf, :],
-        labels=tuple(rightl),
-        weights=tuple(rightw)
-      ),
-    )
-  
-  @classmethod
-  def merge(
-    cls,
-    first: "LabelledExamples",
-    second: "LabelledExamples",
-    second_weight_scale: float
-  ) -> "LabelledExamples":
-    merge_pids = first.pids + second.pids
-    merge_feats = numpy.vstack([first.features, second.features])
-    merge_labels = first.labels + second.labels
-    merge_weights = (
-      first.weights +
-      tuple(second_weight_scale * wi for wi in second.weights)
-    )
-    return LabelledExamples(
-      pids=merge_pids,
-      features=merge_feats,
-      labels=merge_labels,
-      weights=merge_weights
-    )    
-
-
-
-def build_labelled_examples(
-    prev_roster: weekonestats.WeekOneLeague,
-    prev_season: seasonstats.SeasonStats,
-    next_roster: weekonestats.WeekOneLeague,
-    next_season: seasonstats.SeasonStats) -> LabelledExamples:
-  pids = []
-  features = []
-  labels = []
-  weights = []
-  prev_pids = set(prev_season.player_ids)
-  nwos = weekonestats.NUM_WEEK_ONE_FEATURES
-  for pid in next_season.player_ids:
-    if pid not in next_roster.players:
-      continue
-    pids.append(pid)
-    next_season_stats = next_season.get_player_stats(pid)
-    labels.append(next_season_stats.idp_score())
-    weights.append(next_season_stats.weight())
-    vi = numpy.zeros((1, NUM_FEATURES), float)
-    vi[0, :nwos] = next_roster.players[pid].features()
-    if pid in prev_roster.players:
-      vi[0, nwos:(2 * nwos)] = prev_roster.players[pid].features()
-    if pid in prev_pids:
-      prev_season_stats = prev_season.get_player_stats(pid)
-      vi[0, (2 * nwos):] = prev_season_stats.features()
-    features.append(vi)
-  matrix = numpy.vstack(features)
-  return LabelledExamples(
-    pids=tuple(pids),
-    features=matrix,
-    labels=tuple(labels),
-    weights=tuple(weights)
-  )
-
-
-def build_unlabelled_examples(
-    prev_roster: weekonestats.WeekOneLeague,
-    prev_season: seasonstats.SeasonStats,
-    next_roster: weekonestats.WeekOneLeague,
-) -> LabelledExamples:
-  pids = []
-  features = []
-  prev_pids = set(prev_season.player_ids)
-  nwos = weekonestats.NUM_WEEK_ONE_FEATURES
-  for pid in next_roster.players:
-    pids.append(pid)
-    vi = numpy.zeros((1, NUM_FEATURES), float)
-    vi[0, :nwos] = next_roster.players[pid].features()
-    if pid in prev_roster.players:
-      vi[0, nwos:(2 * nwos)] = (
-        prev_roster.players[pid].features())
-    if pid in prev_pids:
-      prev_season_stats = prev_season.get_player_stats(pid)
-      vi[0, (2 * nwos):] = prev_season_stats.features()
-    features.append(vi)
-  matrix = numpy.vstack(features)
-  return LabelledExamples(
-    pids=tuple(pids),
-    features=matrix,
-    labels=tuple(0 for _ in pids),
-    weights=tuple(0 for _ in pids),
-  )
-  
-
-def ridge_param_search(train: LabelledExamples) -> float:
-  """Steadily narrow a range of log-spaced alphas searched by RidgeCV."""
-  lo, hi = (0.01, 100_000_000)  # Powers of ten
-  while hi > (1.1 * lo):
-    alphas=numpy.logspace(numpy.log10(lo), numpy.log10(hi), num=10)
-    rdg = linear_model.RidgeCV(alphas=alphas)
-    rdg.fit(train.features, train.labels, train.weights)
-    best_idx = list(alphas).index(rdg.alpha_)
-    lo = alphas[best_idx - 1] if best_idx != 0 else alphas[best_idx]
-    hi = alphas[best_idx + 1] if best_idx != 0 else alphas[best_idx]
-  alphas=numpy.logspace(numpy.log10(lo), numpy.log10(hi), num=10)
-  rdg = linear_model.RidgeCV(alphas=alphas)
-  rdg.fit(train.features, train.labels, train.weights)
-  return rdg.alpha_ # type: ignore
+def load(args: argparse.Namespace):
+  """List a season's players, or print the model features of specific ones.
 
+  Features are named as in the coefficients CSV: `prev_season_*` and
+  `prev_week_one_*` come from the given season, `next_week_one_*` from the
+  following Week 1 roster (or `--roster-year`).
+  """
+  season = seasonstats.SeasonStats(SEASON_FILES[args.season], "REG")
+  if not args.pid:
+    for pid in season.player_ids:
+      stats = season.get_player_stats(pid)
+      print(f"{pid}\t{stats.name}\t{stats.roles()}\t{stats.idp_score():0.1f}")
+    return
+  import examples
+  roster_year = args.roster_year or (args.season + 1)
+  prev_roster = weekonestats.WeekOneLeague(ROSTER_FILES[args.season])
+  next_roster = weekonestats.WeekOneLeague(ROSTER_FILES[roster_year])
+  for pid in args.pid:
+    print(pid)
+    feats = examples.player_features(pid, prev_roster, season, next_roster)
+    for name, value in zip(examples.FEATURES, feats[0]):
+      if value:
+        print(f"  {name}\t{value}")
 
-def main():
-  s21 = seasonstats.SeasonStats(seasonstats.SEASON_FILES_2021, "REG")
-  s22 = seasonstats.SeasonStats(seasonstats.SEASON_FILES_2022, "REG")
-  s23 = seasonstats.SeasonStats(seasonstats.SEASON_FILES_2023, "REG")
-  r21 = weekonestats.WeekOneLeague(weekonestats.ROSTER_FILE_2021)
-  r22 = weekonestats.WeekOneLeague(weekonestats.ROSTER_FILE_2022)
-  r23 = weekonestats.WeekOneLeague(weekonestats.ROSTER_FILE_2023)
-  r24 = weekonestats.WeekOneLeague(weekonestats.ROSTER_FILE_2024)
-
-  s23_from_s22 = build_labelled_examples(
+
+def build_examples(args: argparse.Namespace):
+  """Build training examples from '21-'23, and examples to score for '24."""
+  import examples
+  s21 = seasonstats.SeasonStats(SEASON_FILES[2021], "REG")
+  s22 = seasonstats.SeasonStats(SEASON_FILES[2022], "REG")
+  s23 = seasonstats.SeasonStats(SEASON_FILES[2023], "REG")
+  r21 = weekonestats.WeekOneLeague(ROSTER_FILES[2021])
+  r22 = weekonestats.WeekOneLeague(ROSTER_FILES[2022])
+  r23 = weekonestats.WeekOneLeague(ROSTER_FILES[2023])
+  r24 = weekonestats.WeekOneLeague(ROSTER_FILES[2024])
+
+  s23_from_s22 = examples.build_labelled_examples(
     prev_roster=r22, prev_season=s22, next_roster=r23, next_season=s23)
-  s22_from_s21 = build_labelled_examples(
+  s22_from_s21 = examples.build_labelled_examples(
     prev_roster=r21, prev_season=s21, next_roster=r22, next_season=s22)
-  s24_from_s23 = build_unlabelled_examples(
+  s24_from_s23 = examples.build_unlabelled_examples(
     prev_roster=r23, prev_season=s23, next_roster=r24)
 
-  train = LabelledExamples.merge(s23_from_s22, s22_from_s21, 0.9)
-
-  best_alpha = sorted([ridge_param_search(train) for _ in range(21)])[10]
-  rdg = linear_model.Ridge(alpha=best_alpha)
-  rdg.fit(train.features, train.labels, train.weights)
-
-  # Save predictions:
-  preds = rdg.predict(s24_from_s23.features)
-  ranking_fields = [
-    "pid",
-    "full_name",
-    "position",
-    "team",
-    "predicted_idp",
-    "drafted",
-    "short_name",
-  ]
-  with open(sys.argv[1], "wt", newline="") as rankfile:
-    writer = csv.DictWriter(rankfile, fieldnames=ranking_fields)
+  train = examples.LabelledExamples.merge(s23_from_s22, s22_from_s21, 0.9)
+  train.save(args.train_npz)
+  s24_from_s23.save(args.score_npz)
+
+
+def tune(args: argparse.Namespace):
+  """Print the cross-validated ridge regularization strength."""
+  import examples
+  import ridgemodel
+  train = examples.LabelledExamples.load(args.train_npz)
+  print(ridgemodel.tune_alpha(train, rounds=args.rounds))
+
+
+def fit(args: argparse.Namespace):
+  """Fit a ridge regression and save its coefficients."""
+  import examples
+  import ridgemodel
+  train = examples.LabelledExamples.load(args.train_npz)
+  alpha = args.alpha
+  if alpha is None:
+    alpha = ridgemodel.tune_alpha(train)
+  model = ridgemodel.fit_ridge(train, alpha)
+  model.to_csv(args.coefs_csv)
+
+
+def predict(args: argparse.Namespace):
+  """Score examples with saved coefficients, best predictions first."""
+  import examples
+  import ridgemodel
+  model = ridgemodel.RidgeModel.from_csv(args.coefs_csv)
+  score = examples.LabelledExamples.load(args.score_npz)
+  preds = model.predict(score.features)
+  with open(args.predictions_csv, "wt", newline="") as predfile:
+    writer = csv.DictWriter(predfile, fieldnames=PREDICTION_FIELDS)
     writer.writeheader()
     pid_pred_pairs = sorted(
-      zip(s24_from_s23.pids, preds), key=lambda t: t[1], reverse=True)
+      zip(score.pids, preds), key=lambda t: t[1], reverse=True)
     for pid, pred in pid_pred_pairs:
+      writer.writerow({"pid": pid, "predicted_idp": f"{pred:0.3f}"})
+
+
+def rank(args: argparse.Namespace):
+  """Join predictions with '24 Week 1 roster details into a draft ranking."""
+  r24 = weekonestats.WeekOneLeague(ROSTER_FILES[2024])
+  with open(args.predictions_csv, "rt") as predfile:
+    preds = [
+      (row["pid"], float(row["predicted_idp"]))
+      for row in csv.DictReader(predfile)
+    ]
+  with open(args.rankings_csv, "wt", newline="") as rankfile:
+    writer = csv.DictWriter(rankfile, fieldnames=RANKING_FIELDS)
+    writer.writeheader()
+    for pid, pred in sorted(preds, key=lambda t: t[1], reverse=True):
       player = r24.players[pid]
       writer.writerow({
         "pid": pid,
@@ -248,19 +164,128 @@ def main():
         "drafted": "",
         "short_name": player.short_name,
       })
-  # Save model:
-  feature_std = train.features.std(axis=0)
-  coef_fields = ["feature_name", "ridge_coef", "stddev"]
-  with open(sys.argv[2], "wt", newline="") as coeffile:
-    writer = csv.DictWriter(coeffile, fieldnames=coef_fields)
-    writer.writeheader()
-    for name, coef, std in zip(FEATURES, rdg.coef_, feature_std):
-      writer.writerow({
-        "feature_name": name,
-        "ridge_coef": str(coef),
-        "stddev": std
-      })
+
+
+def explain_predictions(args: argparse.Namespace):
+  """Save per-feature contributions to each scored player's prediction."""
+  import examples
+  import explain
+  import ridgemodel
+  model = ridgemodel.RidgeModel.from_csv(args.coefs_csv)
+  score = examples.LabelledExamples.load(args.score_npz)
+  explanation = explain.explain(model, score, top_k=args.top_k)
+  explanation.save(args.explanation_npz)
+
+
+def why(args: argparse.Namespace):
+  """Print why players are predicted where they are, from saved breakdowns."""
+  import explain
+  explanation = explain.Explanation.load(args.explanation_npz)
+  if not args.pid:
+    players = explanation.players_by_group(args.group)
+    for pid, total in players[:args.limit]:
+      print(f"{pid}\t{total:0.3f}")
+    return
+  for pid in args.pid:
+    if pid not in explanation:
+      print(f"{pid}\tpid not in explanation")
+      continue
+    print(f"{pid}\tpredicted_idp={explanation.prediction(pid):0.3f}"
+          f"\tintercept={explanation.intercept:0.3f}")
+    for group, total in explanation.group_breakdown(pid).items():
+      if args.group in (None, group):
+        print(f"  [{group}]\t{total:0.3f}")
+    if args.group is None:
+      contributors = explanation.top_contributors(pid)
+    else:
+      contributors = explanation.group_contributors(pid, args.group)
+    for name, contribution in contributors:
+      print(f"  {name}\t{contribution:0.3f}")
+
+
+def npz_path(filename: str) -> str:
+  """Add the `.npz` extension numpy would silently add when saving."""
+  return filename if filename.endswith(".npz") else filename + ".npz"
+
+
+def positive_int(value: str) -> int:
+  number = int(value)
+  if number < 1:
+    raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+  return number
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  subparsers = parser.add_subparsers(dest="command", required=True)
+
+  load_parser = subparsers.add_parser(
+    "load", help=load.__doc__.splitlines()[0])
+  load_parser.add_argument("season", type=int, choices=sorted(SEASON_FILES))
+  load_parser.add_argument("--pid", action="append", default=[])
+  load_parser.add_argument(
+    "--roster-year", type=int, choices=sorted(ROSTER_FILES), default=None,
+    help="Week 1 roster for next_week_one_* features; default season + 1.")
+  load_parser.set_defaults(func=load)
+
+  build_parser = subparsers.add_parser(
+    "build-examples", help=build_examples.__doc__)
+  build_parser.add_argument("train_npz", type=npz_path)
+  build_parser.add_argument("score_npz", type=npz_path)
+  build_parser.set_defaults(func=build_examples)
+
+  tune_parser = subparsers.add_parser("tune", help=tune.__doc__)
+  tune_parser.add_argument("train_npz", type=npz_path)
+  tune_parser.add_argument("--rounds", type=positive_int, default=21)
+  tune_parser.set_defaults(func=tune)
+
+  fit_parser = subparsers.add_parser("fit", help=fit.__doc__)
+  fit_parser.add_argument("train_npz", type=npz_path)
+  fit_parser.add_argument("coefs_csv")
+  fit_parser.add_argument(
+    "--alpha", type=float, default=None,
+    help="Ridge regularization strength; cross-validated if not given.")
+  fit_parser.set_defaults(func=fit)
+
+  predict_parser = subparsers.add_parser("predict", help=predict.__doc__)
+  predict_parser.add_argument("coefs_csv")
+  predict_parser.add_argument("score_npz", type=npz_path)
+  predict_parser.add_argument("predictions_csv")
+  predict_parser.set_defaults(func=predict)
+
+  rank_parser = subparsers.add_parser("rank", help=rank.__doc__)
+  rank_parser.add_argument("predictions_csv")
+  rank_parser.add_argument("rankings_csv")
+  rank_parser.set_defaults(func=rank)
+
+  explain_parser = subparsers.add_parser(
+    "explain", help=explain_predictions.__doc__)
+  explain_parser.add_argument("coefs_csv")
+  explain_parser.add_argument("score_npz", type=npz_path)
+  explain_parser.add_argument("explanation_npz", type=npz_path)
+  explain_parser.add_argument(
+    "--top-k", type=positive_int, default=common.DEFAULT_TOP_K)
+  explain_parser.set_defaults(func=explain_predictions)
+
+  why_parser = subparsers.add_parser("why", help=why.__doc__)
+  why_parser.add_argument("explanation_npz", type=npz_path)
+  why_parser.add_argument("pid", nargs="*")
+  why_parser.add_argument(
+    "--group", choices=common.FEATURE_GROUP_NAMES,
+    help="Only show this feature group's contributions.")
+  why_parser.add_argument("--limit", type=positive_int, default=25)
+  why_parser.set_defaults(func=why)
+
+  args = parser.parse_args(argv)
+  if args.command == "why" and not args.pid and args.group is None:
+    why_parser.error("give at least one pid, or a --group to rank by")
+  return args
+
+
+def main():
+  args = parse_args()
+  args.func(args)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,117 @@
+"""Fit ridge regressions, and save/load/apply them as coefficient CSVs.
+
+Only the fitting functions need scikit-learn, and they import it themselves:
+scoring players from a saved coefficients CSV just takes numpy.
+"""
+
+import csv
+import dataclasses
+
+import numpy
+
+import examples
+
+
+# Row of the coefficients CSV holding the model's intercept term.
+INTERCEPT_NAME = "intercept"
+
+COEF_FIELDS = ("feature_name", "ridge_coef", "stddev")
+
+
+@dataclasses.dataclass(frozen=True)
+class RidgeModel:
+  """A linear model: one coefficient per feature, plus an intercept."""
+  feature_names: tuple[str, ...]
+  coefs: numpy.ndarray
+  stddevs: numpy.ndarray
+  intercept: float
+
+  def __post_init__(self):
+    if len(self.feature_names) != len(self.coefs):
+      raise ValueError(f"len(feature_names) is {len(self.feature_names)} "
+                       f"but len(coefs) is {len(self.coefs)}")
+    if len(self.feature_names) != len(self.stddevs):
+      raise ValueError(f"len(feature_names) is {len(self.feature_names)} "
+                       f"but len(stddevs) is {len(self.stddevs)}")
+
+  def predict(self, features: numpy.ndarray) -> numpy.ndarray:
+    """Predicted IDP for each row of the feature matrix."""
+    if features.shape[1] != len(self.coefs):
+      raise ValueError(f"features have {features.shape[1]} columns "
+                       f"but model has {len(self.coefs)} coefficients")
+    return features @ self.coefs + self.intercept
+
+  def to_csv(self, filename: str):
+    with open(filename, "wt", newline="") as coeffile:
+      writer = csv.DictWriter(coeffile, fieldnames=COEF_FIELDS)
+      writer.writeheader()
+      for name, coef, std in zip(self.feature_names, self.coefs, self.stddevs):
+        writer.writerow({
+          "feature_name": name,
+          "ridge_coef": str(coef),
+          "stddev": str(std),
+        })
+      writer.writerow({
+        "feature_name": INTERCEPT_NAME,
+        "ridge_coef": str(self.intercept),
+        "stddev": "0.0",
+      })
+
+  @classmethod
+  def from_csv(cls, filename: str) -> "RidgeModel":
+    names = []
+    coefs = []
+    stddevs = []
+    intercept = None
+    with open(filename, "rt") as coeffile:
+      for row in csv.DictReader(coeffile):
+        if row["feature_name"] == INTERCEPT_NAME:
+          intercept = float(row["ridge_coef"])
+          continue
+        names.append(row["feature_name"])
+        coefs.append(float(row["ridge_coef"]))
+        stddevs.append(float(row["stddev"]))
+    if intercept is None:
+      raise ValueError(f"No {INTERCEPT_NAME} row in {filename}")
+    return RidgeModel(
+      feature_names=tuple(names),
+      coefs=numpy.array(coefs, float),
+      stddevs=numpy.array(stddevs, float),
+      intercept=intercept,
+    )
+
+
+def ridge_param_search(train: examples.LabelledExamples) -> float:
+  """Steadily narrow a range of log-spaced alphas searched by RidgeCV."""
+  from sklearn import linear_model # type: ignore
+  lo, hi = (0.01, 100_000_000)  # Powers of ten
+  while hi > (1.1 * lo):
+    alphas=numpy.logspace(numpy.log10(lo), numpy.log10(hi), num=10)
+    rdg = linear_model.RidgeCV(alphas=alphas)
+    rdg.fit(train.features, train.labels, train.weights)
+    best_idx = list(alphas).index(rdg.alpha_)
+    lo = alphas[best_idx - 1] if best_idx != 0 else alphas[best_idx]
+    hi = alphas[best_idx + 1] if best_idx != 0 else alphas[best_idx]
+  alphas=numpy.logspace(numpy.log10(lo), numpy.log10(hi), num=10)
+  rdg = linear_model.RidgeCV(alphas=alphas)
+  rdg.fit(train.features, train.labels, train.weights)
+  return rdg.alpha_ # type: ignore
+
+
+def tune_alpha(train: examples.LabelledExamples, rounds: int = 21) -> float:
+  """The median regularization strength over repeated parameter searches."""
+  if rounds < 1:
+    raise ValueError(f"rounds must be at least 1, not {rounds}")
+  return sorted([ridge_param_search(train) for _ in range(rounds)])[rounds // 2]
+
+
+def fit_ridge(train: examples.LabelledExamples, alpha: float) -> RidgeModel:
+  from sklearn import linear_model # type: ignore
+  rdg = linear_model.Ridge(alpha=alpha)
+  rdg.fit(train.features, train.labels, train.weights)
+  return RidgeModel(
+    feature_names=examples.FEATURES,
+    coefs=numpy.asarray(rdg.coef_, float),
+    stddevs=train.features.std(axis=0),
+    intercept=float(rdg.intercept_),
+  )
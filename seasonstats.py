@@ -4,13 +4,15 @@ import collections
 import csv
 import dataclasses
 import itertools
+import typing
 
 from collections.abc import Iterator
 
-import numpy
-
 import common
 
+if typing.TYPE_CHECKING:
+  import numpy
+
 
 # CSV column name mapped to number of IDP points the feature is worth.
 FANTASY_POINTS = {
@@ -131,13 +133,24 @@ PREDICTORS = (
 
 SEASON_STAT_FEATURES = tuple(sorted(PREDICTORS + tuple(FANTASY_POINTS.keys())))
 
+# Games played per team, for each of the offense, defense, kicking CSVs.
+SEASON_TEAM_FEATURES = tuple(
+  f"{role}_games_{team}"
+  for role in ("off", "def", "kck")
+  for team in common.TEAMS
+)
+
+SEASON_POSITION_FEATURES = tuple(f"position_{pos}" for pos in common.POSITIONS)
 
-NUM_SEASON_FEATURES = (
-  len(SEASON_STAT_FEATURES) +
-  (3 * len(common.TEAMS)) +
-  len(common.POSITIONS)
+# Names for each column of `PlayerSeason.features()`, in order.
+SEASON_FEATURES = (
+  SEASON_STAT_FEATURES +
+  SEASON_TEAM_FEATURES +
+  SEASON_POSITION_FEATURES
 )
 
+NUM_SEASON_FEATURES = len(SEASON_FEATURES)
+
 @dataclasses.dataclass(frozen=True)
 class SeasonFiles:
   """Paths to CSV files describing player stats over an NFL season."""
@@ -253,7 +266,8 @@ class PlayerSeason:
   def _position_features(self) -> Iterator[float]:
     yield from (self._positions[pos] for pos in common.POSITIONS)
   
-  def features(self) -> numpy.ndarray:
+  def features(self) -> "numpy.ndarray":
+    import numpy  # Deferred: listing players shouldn't pay for numpy.
     return numpy.fromiter(
       itertools.chain(
         self._numeric_features(),
@@ -284,6 +298,9 @@ class SeasonStats:
           self._players[pid] = PlayerSeason(pid=pid, name=name)
         self._players[pid].add_row(row)
 
+  def __contains__(self, player_id: str) -> bool:
+    return player_id in self._players
+
   @property
   def player_ids(self) -> Iterator[str]:
     """All the player IDs recorded for this season."""
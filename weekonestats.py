@@ -3,11 +3,13 @@
 import csv
 import dataclasses
 import datetime
-
-import numpy
+import typing
 
 import common
 
+if typing.TYPE_CHECKING:
+  import numpy
+
 
 ROSTER_FILE_2021 = "./data/roster_weekly_2022.csv"
 ROSTER_FILE_2022 = "./data/roster_weekly_2022.csv"
@@ -46,7 +48,8 @@ class WeekOnePlayer:
   rookie_age: float
   draft_number: float
 
-  def features(self) -> numpy.ndarray:
+  def features(self) -> "numpy.ndarray":
+    import numpy  # Deferred: ranking from saved predictions skips numpy.
     return numpy.array([
       1.0 if self.active else 0.0,  # 0
       self.age, self.height, self.weight,  # 1, 2, 3